@@ -0,0 +1,654 @@
+"""Benchmarks hors-ligne des services ESP32 (main.py) et Tranon'AI (voskPy.py).
+
+Tout tourne en local sans MySQL, Ollama ni ESP32 :
+- MySQL est remplacé par une base SQLite temporaire
+- Ollama est remplacé par un petit serveur HTTP local
+- l'audio PCM et l'image de prétraitement sont générés ; les scénarios de
+  détection faciale exigent une vraie photo (--face-image), car un visage
+  dessiné n'est pas détecté par HOG et ne mesurerait que le pire cas
+
+Exemples :
+    python benchmark.py --quick
+    python benchmark.py --only gas_broadcast gas_load --save-baseline bench_baseline.json
+    python benchmark.py --compare bench_baseline.json --tolerance 0.2
+    python benchmark.py --only face_encoding mixed_camera_load --face-image visage.jpg
+
+Les scénarios dont les dépendances (face_recognition, modèle Vosk, httpx...)
+ne sont pas disponibles sont ignorés avec la raison affichée.
+"""
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import wave
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SCENARIOS = {}
+
+
+class SkipScenario(Exception):
+    pass
+
+
+def scenario(name):
+    def decorator(func):
+        SCENARIOS[name] = func
+        return func
+    return decorator
+
+
+# ==================== MESURES ====================
+
+def rss_mb():
+    """Mémoire résidente du processus en Mo"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / (1024 * 1024) if sys.platform == "darwin" else maxrss / 1024
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def summarize(latencies, wall_seconds, rss_before, errors=0):
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "throughput": round(len(values) / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(values) * 1000, 3) if values else 0.0,
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - rss_before, 1),
+    }
+
+
+def run_micro(fn, iterations, warmup=3):
+    for _ in range(warmup):
+        fn()
+    rss_before = rss_mb()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - start, rss_before)
+
+
+# ==================== STAND-INS ====================
+
+class _SQLiteCursor:
+    """Curseur compatible avec l'usage de mysql.connector dans main.py"""
+
+    def __init__(self, conn, dictionary):
+        self._cursor = conn.cursor()
+        self._dictionary = dictionary
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def execute(self, query, params=()):
+        self._cursor.execute(query.replace("%s", "?"), params)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {col[0]: value for col, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+
+class _SQLiteConnection:
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+
+    def cursor(self, dictionary=False):
+        return _SQLiteCursor(self._conn, dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        self._conn.close()
+
+
+def install_fake_mysql(main_module, workdir):
+    """Remplace get_db_connection de main.py par une base SQLite"""
+    path = os.path.join(workdir, "esp32.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE IF NOT EXISTS device (id INTEGER PRIMARY KEY AUTOINCREMENT, status INTEGER, name TEXT)")
+    conn.executemany("INSERT INTO device (status, name) VALUES (?, ?)", [(i % 2, f"Lampe {i}") for i in range(1, 11)])
+    conn.commit()
+    conn.close()
+
+    @contextmanager
+    def get_db_connection():
+        connection = _SQLiteConnection(path)
+        try:
+            yield connection
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    main_module.get_db_connection = get_db_connection
+
+
+class _StubOllamaHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.delay)
+        if self.path == "/api/embeddings":
+            prompt = json.loads(body or b"{}").get("prompt", "")
+            payload = {"embedding": [float(ord(c) % 7) for c in prompt[:32].ljust(32)]}
+        else:
+            payload = {"message": {"role": "assistant", "content": "Allez dans la page Energie puis l'onglet aperçu."}}
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_ollama(delay):
+    _StubOllamaHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class FakeWebSocket:
+    """Client WebSocket simulé pour GasConnectionManager"""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, message):
+        self.sent += 1
+
+
+def synthetic_face_image(size=640, seed=0):
+    """Image JPEG d'un visage dessiné (ovale, yeux, nez, bouche)"""
+    from PIL import Image, ImageDraw
+    rng = random.Random(seed)
+    image = Image.new("RGB", (size, size), (rng.randint(150, 220),) * 3)
+    draw = ImageDraw.Draw(image)
+    cx, cy, w, h = size // 2, size // 2, size // 3, size // 2.4
+    draw.ellipse((cx - w // 2, cy - h // 2, cx + w // 2, cy + h // 2), fill=(224, 172, 140))
+    for dx in (-w // 5, w // 5):
+        draw.ellipse((cx + dx - 18, cy - h // 8 - 10, cx + dx + 18, cy - h // 8 + 10), fill=(255, 255, 255))
+        draw.ellipse((cx + dx - 7, cy - h // 8 - 7, cx + dx + 7, cy - h // 8 + 7), fill=(40, 30, 20))
+        draw.line((cx + dx - 25, cy - h // 8 - 28, cx + dx + 25, cy - h // 8 - 30), fill=(60, 40, 30), width=6)
+    draw.line((cx, cy - 10, cx - 10, cy + h // 10), fill=(180, 120, 100), width=4)
+    draw.arc((cx - w // 5, cy + h // 8, cx + w // 5, cy + h // 4), 10, 170, fill=(150, 50, 50), width=6)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def synthetic_pcm_wav(seconds, path, rate=16000, seed=0):
+    """WAV mono 16 bits : mélange de sinusoïdes modulées et de bruit, façon parole"""
+    import struct
+    rng = random.Random(seed)
+    frames = bytearray()
+    for i in range(int(seconds * rate)):
+        t = i / rate
+        envelope = 0.5 + 0.5 * math.sin(2 * math.pi * 3 * t)
+        sample = envelope * (0.4 * math.sin(2 * math.pi * 220 * t) + 0.2 * math.sin(2 * math.pi * 660 * t))
+        sample += rng.uniform(-0.05, 0.05)
+        frames += struct.pack("<h", int(max(-1.0, min(1.0, sample)) * 32767))
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(bytes(frames))
+    return path
+
+
+class _Upload:
+    """Équivalent minimal d'UploadFile pour les fonctions de main.py"""
+
+    def __init__(self, data, content_type="image/jpeg"):
+        self.file = io.BytesIO(data)
+        self.content_type = content_type
+
+
+# ==================== CONTEXTE ====================
+
+class BenchContext:
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix="esp32-bench-")
+        self._main = None
+        self._vosk = None
+        self.ollama_url = None
+
+    def _import(self, name):
+        try:
+            return __import__(name)
+        except (ImportError, SystemExit) as e:
+            # face_recognition appelle quit() (SystemExit) si ses modèles sont absents
+            raise SkipScenario(f"{name} indisponible ({e!r})")
+
+    @property
+    def main(self):
+        if self._main is None:
+            self._main = self._import("main")
+            install_fake_mysql(self._main, self.workdir)
+        return self._main
+
+    @property
+    def vosk_service(self):
+        if self._vosk is None:
+            service = self._import("voskPy")
+            _, self.ollama_url = start_stub_ollama(self.args.ollama_delay / 1000)
+            service.OLLAMA_URL = self.ollama_url
+            self._vosk = service
+        return self._vosk
+
+    def require(self, module):
+        self._import(module)
+
+    def face_image(self):
+        if self.args.face_image:
+            with open(self.args.face_image, "rb") as f:
+                return f.read()
+        self.require("PIL")
+        return synthetic_face_image()
+
+    def real_face_image(self):
+        if not self.args.face_image:
+            raise SkipScenario("nécessite --face-image (photo réelle contenant un visage)")
+        return self.face_image()
+
+    def face_recognition(self):
+        self.require("face_recognition")
+        return self.main.face_recognition_module.get()
+
+    def client(self):
+        httpx = self._import("httpx")
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self.main.app), base_url="http://bench")
+
+
+# ==================== MICRO-BENCHMARKS ====================
+
+@scenario("face_preprocess")
+def bench_face_preprocess(ctx):
+    main, data = ctx.main, ctx.face_image()
+    return run_micro(lambda: main.load_and_preprocess_image(_Upload(data)), ctx.args.iterations)
+
+
+@scenario("face_encoding")
+def bench_face_encoding(ctx):
+    data = ctx.real_face_image()
+    ctx.face_recognition()
+    from fastapi import HTTPException
+    main = ctx.main
+    image = main.load_and_preprocess_image(_Upload(data))
+    try:
+        main.get_face_encoding_improved(image)
+    except HTTPException as e:
+        raise SkipScenario(f"--face-image inutilisable : {e.detail}")
+    return run_micro(lambda: main.get_face_encoding_improved(image), max(1, ctx.args.iterations // 10), warmup=1)
+
+
+@scenario("face_distance")
+def bench_face_distance(ctx):
+    face_recognition = ctx.face_recognition()
+    import numpy as np
+    rng = np.random.default_rng(0)
+    known = [rng.normal(size=128) for _ in range(ctx.args.faces)]
+    probe = rng.normal(size=128)
+    return run_micro(lambda: face_recognition.face_distance(known, probe), ctx.args.iterations)
+
+
+@scenario("gas_broadcast")
+def bench_gas_broadcast(ctx):
+    main = ctx.main
+    results = {}
+    for sockets in ctx.args.sockets:
+        manager = main.GasConnectionManager()
+        manager.active_connections = [FakeWebSocket() for _ in range(sockets)]
+        message = json.dumps({"value": 250})
+        loop = asyncio.new_event_loop()
+        try:
+            results[f"n={sockets}"] = run_micro(
+                lambda: loop.run_until_complete(manager.broadcast(message)), ctx.args.iterations)
+        finally:
+            loop.close()
+    return results
+
+
+@scenario("vosk_decode")
+def bench_vosk_decode(ctx):
+    service = ctx.vosk_service
+    if not os.path.isdir(service.model_path):
+        raise SkipScenario(f"modèle Vosk absent ({service.model_path})")
+    vosk = ctx._import("vosk")
+    model = service.vosk_model.get()
+    path = synthetic_pcm_wav(ctx.args.audio_seconds, os.path.join(ctx.workdir, "speech.wav"))
+
+    def decode():
+        with wave.open(path, "rb") as wav_file:
+            rec = vosk.KaldiRecognizer(model, wav_file.getframerate())
+            while True:
+                data = wav_file.readframes(4000)
+                if len(data) == 0:
+                    break
+                rec.AcceptWaveform(data)
+            rec.FinalResult()
+    return run_micro(decode, max(1, ctx.args.iterations // 20), warmup=1)
+
+
+@scenario("llm_call")
+def bench_llm_call(ctx):
+    service = ctx.vosk_service
+    questions = ["Comment payer ma facture JIRAMA ?", "Où voir l'état des capteurs ?", "Comment allumer la lampe 1 ?"]
+    counter = iter(range(10 ** 9))
+
+    def ask():
+        del service.conversation_history[1:]
+        service.call_ollama_chat_mistral(questions[next(counter) % len(questions)])
+
+    results = {}
+    enabled = service.RESPONSE_CACHE_ENABLED
+    try:
+        service.RESPONSE_CACHE_ENABLED = False
+        results["sans_cache"] = run_micro(ask, ctx.args.iterations)
+        service.RESPONSE_CACHE_ENABLED = True
+        service.response_cache.clear()
+        results["avec_cache"] = run_micro(ask, ctx.args.iterations)
+        results["avec_cache"]["hit_rate"] = service.response_cache.stats()["hit_rate"]
+    finally:
+        service.RESPONSE_CACHE_ENABLED = enabled
+        del service.conversation_history[1:]
+    return results
+
+
+# ==================== SCÉNARIOS DE CHARGE ====================
+
+async def _esp32_gas_sender(client, duration, latencies, errors, rng):
+    """Un ESP32 qui poste une valeur MQ135 toutes les secondes"""
+    await asyncio.sleep(rng.random())  # désynchronise les capteurs
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        tick = time.perf_counter()
+        try:
+            response = await client.post("/gas-detector", json={"value": rng.randint(100, 400)})
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except Exception as e:
+            errors.append(str(e))
+        latencies.append(time.perf_counter() - tick)
+        await asyncio.sleep(max(0.0, 1.0 - (time.perf_counter() - tick)))
+
+
+def _run_load(ctx, coroutine_factory):
+    async def runner():
+        async with ctx.client() as client:
+            return await coroutine_factory(client)
+    return asyncio.run(runner())
+
+
+@scenario("gas_load")
+def bench_gas_load(ctx):
+    main, args = ctx.main, ctx.args
+    main.gas_manager.active_connections = [FakeWebSocket() for _ in range(args.mobile_clients)]
+    latencies, errors = [], []
+
+    async def load(client):
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            _esp32_gas_sender(client, args.duration, latencies, errors, random.Random(i))
+            for i in range(args.esp32)
+        ])
+        return summarize(latencies, time.perf_counter() - start, rss_before, len(errors))
+    try:
+        return _run_load(ctx, load)
+    finally:
+        main.gas_manager.active_connections = []
+
+
+@scenario("device_toggle_load")
+def bench_device_toggle_load(ctx):
+    args = ctx.args
+    ctx.main  # installe la base SQLite
+    latencies, errors = [], []
+
+    async def worker(client):
+        for _ in range(args.requests):
+            t0 = time.perf_counter()
+            try:
+                response = await client.post("/device/toggle/")
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+            except Exception as e:
+                errors.append(str(e))
+            latencies.append(time.perf_counter() - t0)
+
+    async def load(client):
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(client) for _ in range(args.concurrency)])
+        return summarize(latencies, time.perf_counter() - start, rss_before, len(errors))
+    return _run_load(ctx, load)
+
+
+@scenario("mixed_camera_load")
+def bench_mixed_camera_load(ctx):
+    args = ctx.args
+    image = ctx.real_face_image()
+    ctx.face_recognition()
+    camera_latencies, camera_errors = [], []
+    no_face = []
+    gas_latencies, gas_errors = [], []
+
+    async def camera(client, deadline):
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                response = await client.post("/detect-face", files={"image": ("cam.jpg", image, "image/jpeg")})
+                if response.status_code != 200:
+                    camera_errors.append(response.status_code)
+                elif response.json().get("faces_detected", 0) == 0:
+                    # Passe par les replis CNN / suréchantillonnage : ce n'est plus du trafic normal
+                    no_face.append(1)
+            except Exception as e:
+                camera_errors.append(str(e))
+            camera_latencies.append(time.perf_counter() - t0)
+
+    async def load(client):
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            *[camera(client, deadline) for _ in range(args.cameras)],
+            *[_esp32_gas_sender(client, args.duration, gas_latencies, gas_errors, random.Random(i))
+              for i in range(args.esp32 // 4 or 1)],
+        )
+        wall = time.perf_counter() - start
+        detect_face = summarize(camera_latencies, wall, rss_before, len(camera_errors) + len(no_face))
+        detect_face["no_face"] = len(no_face)
+        if no_face:
+            print(f"  ⚠️ {len(no_face)} requête(s) /detect-face sans visage détecté, comptées en erreur")
+        return {
+            "detect_face": detect_face,
+            "gas": summarize(gas_latencies, wall, rss_before, len(gas_errors)),
+        }
+    return _run_load(ctx, load)
+
+
+# ==================== RAPPORT ====================
+
+def flatten(results):
+    """{"gas_broadcast": {"n=10": {...}}} -> {"gas_broadcast.n=10": {...}}"""
+    flat = {}
+    for name, value in results.items():
+        if "p50_ms" in value:
+            flat[name] = value
+        else:
+            for sub, stats in value.items():
+                flat[f"{name}.{sub}"] = stats
+    return flat
+
+
+def print_report(flat):
+    print(f"{'scénario':<34}{'n':>7}{'err':>5}{'débit/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'RSS Mo':>9}")
+    for name, s in flat.items():
+        print(f"{name:<34}{s['count']:>7}{s['errors']:>5}{s['throughput']:>11}"
+              f"{s['p50_ms']:>10}{s['p99_ms']:>10}{s['rss_mb']:>9}")
+
+
+def compare(flat, baseline, tolerance):
+    """Affiche les écarts avec la référence et retourne le nombre de régressions"""
+    regressions = 0
+    print(f"\nComparaison avec la référence (tolérance {tolerance:.0%})")
+    for name, s in flat.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"  {name:<34} nouveau")
+            continue
+        notes = []
+        for key, higher_is_worse in (("p50_ms", True), ("p99_ms", True), ("throughput", False)):
+            if not old[key]:
+                continue
+            change = (s[key] - old[key]) / old[key]
+            worse = change > tolerance if higher_is_worse else change < -tolerance
+            regressions += worse
+            notes.append(f"{key} {change:+.1%}{' ❌' if worse else ''}")
+        print(f"  {name:<34} " + ", ".join(notes))
+    for name in baseline:
+        if name not in flat:
+            print(f"  {name:<34} absent (ignoré ou non exécuté)")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="scénarios à exécuter")
+    parser.add_argument("--quick", action="store_true", help="paramètres réduits pour une exécution rapide")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--sockets", type=int, nargs="+", default=[1, 10, 100, 1000], help="tailles de diffusion")
+    parser.add_argument("--faces", type=int, default=100, help="visages connus pour face_distance")
+    parser.add_argument("--face-image", help="photo réelle contenant un visage (requise pour face_encoding et mixed_camera_load)")
+    parser.add_argument("--audio-seconds", type=float, default=5.0)
+    parser.add_argument("--ollama-delay", type=float, default=50.0, help="latence simulée d'Ollama (ms)")
+    parser.add_argument("--esp32", type=int, default=200, help="ESP32 simulés postant à 1 Hz")
+    parser.add_argument("--mobile-clients", type=int, default=50, help="WebSocket gaz connectés")
+    parser.add_argument("--duration", type=float, default=10.0, help="durée des scénarios de charge (s)")
+    parser.add_argument("--concurrency", type=int, default=20, help="clients concurrents pour les toggles")
+    parser.add_argument("--requests", type=int, default=50, help="toggles par client")
+    parser.add_argument("--cameras", type=int, default=4, help="caméras simultanées")
+    parser.add_argument("--json", help="écrit les résultats bruts dans ce fichier")
+    parser.add_argument("--save-baseline", help="enregistre les résultats comme référence")
+    parser.add_argument("--compare", help="compare avec une référence enregistrée")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="écart relatif toléré avant régression")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.iterations, args.sockets, args.audio_seconds = 30, [1, 100], 2.0
+        args.esp32, args.duration, args.concurrency, args.requests = 20, 3.0, 5, 10
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Les modèles sont chargés à la demande par les scénarios qui en ont besoin
+    os.environ.setdefault("WARMUP_MODELS", "0")
+    os.environ.setdefault("ESP32_FEATURES", "face,devices,gas,voice")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    ctx = BenchContext(args)
+    results = {}
+    failed = []
+    for name in args.only or list(SCENARIOS):
+        print(f"▶ {name}...", flush=True)
+        try:
+            results[name] = SCENARIOS[name](ctx)
+        except SkipScenario as e:
+            print(f"  ⏭ ignoré : {e}")
+        except Exception as e:
+            # Un scénario en échec ne doit pas empêcher le rapport ni la comparaison
+            print(f"  ❌ échec : {e!r}")
+            failed.append(name)
+
+    flat = flatten(results)
+    print()
+    print_report(flat)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(flat, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(flat, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Référence enregistrée dans {args.save_baseline}")
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(flat, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n❌ {regressions} régression(s) au-delà de la tolérance")
+            status = 1
+    if failed:
+        print(f"\n❌ Scénario(s) en échec : {', '.join(failed)}")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
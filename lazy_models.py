@@ -0,0 +1,113 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+ALL_FEATURES = {"face", "voice", "devices", "gas"}
+
+
+def enabled_features(default: Iterable[str]) -> Set[str]:
+    """Groupes de fonctionnalités actifs pour ce processus.
+
+    Lus depuis ESP32_FEATURES (ex: "gas,devices"), sinon ``default``.
+    """
+    raw = os.getenv("ESP32_FEATURES")
+    if raw is None:
+        return set(default)
+    features = {f.strip().lower() for f in raw.split(",") if f.strip()}
+    unknown = features - ALL_FEATURES
+    if unknown:
+        logger.warning(f"⚠️ Fonctionnalités inconnues ignorées: {sorted(unknown)}")
+    return features & ALL_FEATURES
+
+
+def warmup_enabled() -> bool:
+    """WARMUP_MODELS=0 : chargement uniquement à la première utilisation"""
+    return os.getenv("WARMUP_MODELS", "1") != "0"
+
+
+class LazyResource:
+    """Ressource lourde (modèle, bibliothèque) chargée une seule fois, à la demande
+    ou en arrière-plan au démarrage."""
+
+    PENDING = "pending"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, name: str, loader: Callable[[], object]):
+        self.name = name
+        self._loader = loader
+        self._value = None
+        self._error: Optional[BaseException] = None
+        self._status = self.PENDING
+        self._load_seconds: Optional[float] = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @property
+    def ready(self) -> bool:
+        return self._status == self.READY
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            value = self._loader()
+        except BaseException as e:
+            # face_recognition appelle quit() (SystemExit) si ses modèles sont absents
+            self._error = e
+            self._status = self.FAILED
+            logger.error(f"❌ Échec du chargement de {self.name}: {e!r}")
+            if not isinstance(e, (Exception, SystemExit)):
+                raise
+        else:
+            self._value = value
+            self._status = self.READY
+            self._load_seconds = time.perf_counter() - start
+            logger.info(f"✅ {self.name} chargé en {self._load_seconds:.2f}s")
+        finally:
+            self._done.set()
+
+    def _claim(self) -> bool:
+        with self._lock:
+            if self._status != self.PENDING:
+                return False
+            self._status = self.LOADING
+            return True
+
+    def start_background(self):
+        """Lance le chargement dans un thread sans bloquer l'appelant"""
+        if self._claim():
+            logger.info(f"⏳ Préchargement de {self.name} en arrière-plan...")
+            threading.Thread(target=self._load, name=f"warmup-{self.name}", daemon=True).start()
+
+    def get(self, timeout: Optional[float] = None):
+        """Retourne la ressource, en la chargeant si nécessaire.
+
+        Lève TimeoutError si elle n'est pas prête après ``timeout`` secondes,
+        ou RuntimeError si le chargement a échoué.
+        """
+        if self._status == self.READY:
+            return self._value
+        if self._claim():
+            self._load()
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} en cours de chargement")
+        if self._status == self.FAILED:
+            raise RuntimeError(f"{self.name} non chargé: {self._error!r}")
+        return self._value
+
+    def describe(self) -> Dict[str, object]:
+        info: Dict[str, object] = {"status": self._status}
+        if self._load_seconds is not None:
+            info["load_seconds"] = round(self._load_seconds, 3)
+        if self._error is not None:
+            info["error"] = repr(self._error)
+        return info
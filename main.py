@@ -1,18 +1,19 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, APIRouter, HTTPException, File, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from contextlib import contextmanager
 from typing import List, Optional, Generic, TypeVar
 from pydantic.generics import GenericModel
-import mysql.connector
-from mysql.connector import Error
 from fastapi.middleware.cors import CORSMiddleware
-import face_recognition
-import numpy as np
-from PIL import Image, ImageOps
 import io
+import os
 import logging
 import json
+import time
 from datetime import datetime
+from lazy_models import LazyResource, enabled_features, warmup_enabled
+import metrics
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -35,6 +36,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+metrics.install(app)
+
+# 🧩 Groupes de fonctionnalités actifs (ESP32_FEATURES=gas,devices pour un worker léger)
+FEATURES = enabled_features({"face", "devices", "gas"})
+MODEL_WAIT_TIMEOUT = float(os.getenv("MODEL_WAIT_TIMEOUT", "30"))
+
+device_router = APIRouter()
+face_router = APIRouter()
+gas_router = APIRouter()
+
+# face_recognition (dlib + modèles) n'est importé qu'au préchargement ou à la première requête
+face_recognition_module = LazyResource("face_recognition", lambda: __import__("face_recognition"))
+
+@app.on_event("startup")
+def warmup_models():
+    if "face" in FEATURES and warmup_enabled():
+        face_recognition_module.start_background()
+
+def get_face_recognition():
+    try:
+        return face_recognition_module.get(timeout=MODEL_WAIT_TIMEOUT)
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="Modèle de reconnaissance faciale en cours de chargement")
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def wait_for_face_recognition():
+    """Version pour les routes async : l'attente du modèle ne bloque pas la boucle d'événements"""
+    return await run_in_threadpool(get_face_recognition)
 
 # Modèles Pydantic
 class Device(BaseModel):
@@ -68,14 +98,18 @@ class GasConnectionManager:
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        metrics.WEBSOCKET_CONNECTIONS.set(len(self.active_connections), "gas")
         logger.info(f"📱 Client gaz connecté. Total: {len(self.active_connections)}")
     
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
+            metrics.WEBSOCKET_CONNECTIONS.set(len(self.active_connections), "gas")
         logger.info(f"📱 Client gaz déconnecté. Total: {len(self.active_connections)}")
     
     async def broadcast(self, message: str):
+        start = time.perf_counter()
+        fanout = len(self.active_connections)
         disconnected_connections = []
         for connection in self.active_connections:
             try:
@@ -87,6 +121,10 @@ class GasConnectionManager:
         for connection in disconnected_connections:
             self.disconnect(connection)
 
+        if metrics.METRICS_ENABLED:
+            metrics.BROADCAST_LATENCY.observe(time.perf_counter() - start, "gas")
+            metrics.BROADCAST_FANOUT.observe(fanout, "gas")
+
 # Initialisation du manager
 gas_manager = GasConnectionManager()
 
@@ -96,10 +134,15 @@ current_gas_value = 0
 # Gestionnaire de connexion MySQL
 @contextmanager
 def get_db_connection():
+    import mysql.connector
+    from mysql.connector import Error
     conn = None
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        yield conn
+        with metrics.stage("db_connect"):
+            conn = mysql.connector.connect(**DB_CONFIG)
+        # Durée de la session (requêtes + corps de la route), pas seulement des requêtes SQL
+        with metrics.stage("db_session", expected=(HTTPException,)):
+            yield conn
     except Error as e:
         logger.error(f"Erreur MySQL: {e}")
         if conn:
@@ -115,8 +158,11 @@ def get_db_connection():
             conn.close()
 
 # Fonctions pour la reconnaissance faciale (inchangées)
+@metrics.timed("load_and_preprocess_image", expected=(HTTPException,))
 def load_and_preprocess_image(file: UploadFile):
     """Charge et prétraite une image pour améliorer la détection faciale"""
+    import numpy as np
+    from PIL import Image, ImageOps
     try:
         image_data = file.file.read()
         image = Image.open(io.BytesIO(image_data))
@@ -135,8 +181,10 @@ def load_and_preprocess_image(file: UploadFile):
         logger.error(f"Erreur lors du chargement de l'image: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Erreur lors du chargement de l'image: {str(e)}")
 
+@metrics.timed("get_face_encoding_improved", expected=(HTTPException,))
 def get_face_encoding_improved(image_array):
     """Extrait l'encodage facial avec le modèle HOG uniquement"""
+    face_recognition = get_face_recognition()
     try:
         # Une seule tentative avec le modèle par défaut (HOG)
         face_locations = face_recognition.face_locations(image_array)
@@ -188,6 +236,8 @@ def read_root():
 
 @app.get("/health")
 def health_check():
+    if "devices" not in FEATURES:
+        return {"status": "healthy", "database": "disabled", "gas_value": current_gas_value}
     try:
         with get_db_connection() as connection:
             with connection.cursor(dictionary=True) as cursor:
@@ -202,7 +252,7 @@ def health_check():
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
-@app.post("/device/", response_model=ApiResponse[DeviceResponse])
+@device_router.post("/device/", response_model=ApiResponse[DeviceResponse])
 def create_device_status(device: Device):
     with get_db_connection() as connection:
         with connection.cursor(dictionary=True) as cursor:
@@ -222,7 +272,7 @@ def create_device_status(device: Device):
             )
             return ApiResponse(data=response, message="Creation fait")
 
-@app.get("/device/", response_model=ApiResponse[List[DeviceResponse]])
+@device_router.get("/device/", response_model=ApiResponse[List[DeviceResponse]])
 def get_all_device_status(skip: int = 0, limit: int = 100):
     with get_db_connection() as connection:
         with connection.cursor(dictionary=True) as cursor:
@@ -238,7 +288,7 @@ def get_all_device_status(skip: int = 0, limit: int = 100):
             ]
             return ApiResponse(data=response, message="Liste des lampes")
 
-@app.get("/device/{device_id}", response_model=ApiResponse[DeviceResponse])
+@device_router.get("/device/{device_id}", response_model=ApiResponse[DeviceResponse])
 def get_device_status(device_id: int):
     with get_db_connection() as connection:
         with connection.cursor(dictionary=True) as cursor:
@@ -249,7 +299,7 @@ def get_device_status(device_id: int):
             response = DeviceResponse(id=device_data['id'], status=bool(device_data['status']), name=device_data['name']) # type: ignore
             return ApiResponse(data=response, message="Lampe numero " + str(response.id))
 
-@app.put("/device/{device_id}", response_model=ApiResponse[DeviceResponse])
+@device_router.put("/device/{device_id}", response_model=ApiResponse[DeviceResponse])
 def update_device_status(device: Device):
     with get_db_connection() as connection:
         with connection.cursor(dictionary=True) as cursor:
@@ -266,7 +316,7 @@ def update_device_status(device: Device):
             response = DeviceResponse(id=device_data['id'], status=bool(device_data['status']), name=device_data['name']) # type: ignore
             return ApiResponse(data=response, message="Lampe numero " + str(response.id) + " Modifier")
 
-@app.delete("/device/{device_id}")
+@device_router.delete("/device/{device_id}")
 def delete_device_status(device_id: int):
     with get_db_connection() as connection:
         with connection.cursor() as cursor:
@@ -276,7 +326,7 @@ def delete_device_status(device_id: int):
             connection.commit()
             return {"message": f"Statut device {device_id} supprimé avec succès"}
 
-@app.post("/device/toggle/", response_model=DeviceResponse)
+@device_router.post("/device/toggle/", response_model=DeviceResponse)
 def toggle_device():
     with get_db_connection() as connection:
         with connection.cursor(dictionary=True) as cursor:
@@ -294,7 +344,7 @@ def toggle_device():
             return DeviceResponse(id=device_data['id'], status=bool(device_data['status']), name=device_data['name']) # type: ignore
 
 # Routes pour la reconnaissance faciale
-@app.post("/compare-faces", response_model=ApiResponse[FaceMatchResponse])
+@face_router.post("/compare-faces", response_model=ApiResponse[FaceMatchResponse])
 async def compare_faces_files(
     camera_image: UploadFile = File(...),
     stored_image: UploadFile = File(...)
@@ -316,10 +366,12 @@ async def compare_faces_files(
         
         logger.info(f"✅ Images chargées - Camera shape: {img1.shape}, Stored shape: {img2.shape}")
 
+        face_recognition = await wait_for_face_recognition()
         face1 = get_face_encoding_improved(img1)
         face2 = get_face_encoding_improved(img2)
 
-        distance = face_recognition.face_distance([face1], face2)[0]
+        with metrics.stage("face_distance"):
+            distance = face_recognition.face_distance([face1], face2)[0]
         match = distance < 0.5
 
         logger.info(f"🔍 Résultat comparaison - Distance: {distance:.4f}, Match: {match}")
@@ -349,11 +401,12 @@ async def compare_faces_files(
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Erreur lors de la comparaison: {str(e)}")
 
-@app.post("/detect-face")
+@face_router.post("/detect-face")
 async def detect_face_only(image: UploadFile = File(...)):
     """
     Route pour tester la détection faciale sur une seule image
     """
+    face_recognition = await wait_for_face_recognition()
     try:
         logger.info("🔍 Test de détection faciale...")
         
@@ -363,13 +416,14 @@ async def detect_face_only(image: UploadFile = File(...)):
         img = load_and_preprocess_image(image)
         logger.info(f"Image chargée - Shape: {img.shape}")
         
-        face_locations = face_recognition.face_locations(img)
-        
-        if len(face_locations) == 0:
-            face_locations = face_recognition.face_locations(img, model="cnn")
+        with metrics.stage("face_locations"):
+            face_locations = face_recognition.face_locations(img)
             
-        if len(face_locations) == 0:
-            face_locations = face_recognition.face_locations(img, number_of_times_to_upsample=2)
+            if len(face_locations) == 0:
+                face_locations = face_recognition.face_locations(img, model="cnn")
+                
+            if len(face_locations) == 0:
+                face_locations = face_recognition.face_locations(img, number_of_times_to_upsample=2)
             
         return {
             "faces_detected": len(face_locations),
@@ -384,7 +438,7 @@ async def detect_face_only(image: UploadFile = File(...)):
 
 # ==================== ROUTES DÉTECTEUR DE GAZ SIMPLIFIÉES ====================
 
-@app.websocket("/ws/gas")
+@gas_router.websocket("/ws/gas")
 async def gas_websocket_endpoint(websocket: WebSocket):
     """WebSocket pour les données du détecteur de gaz en temps réel"""
     await gas_manager.connect(websocket)
@@ -403,12 +457,14 @@ async def gas_websocket_endpoint(websocket: WebSocket):
                 break
                 
     except WebSocketDisconnect:
-        gas_manager.disconnect(websocket)
+        pass
     except Exception as e:
         logger.error(f"Erreur WebSocket gaz: {e}")
+    finally:
+        # Aussi après le break de la boucle : sinon le client reste compté comme actif
         gas_manager.disconnect(websocket)
 
-@app.post("/gas-detector")
+@gas_router.post("/gas-detector")
 async def receive_gas_value(data: GasData):
     """Reçoit les données du détecteur de gaz"""
     global current_gas_value
@@ -429,7 +485,7 @@ async def receive_gas_value(data: GasData):
         "message": gas_status
     }
 
-@app.get("/gas-detector")
+@gas_router.get("/gas-detector")
 async def get_gas_value():
     """Retourne la dernière valeur du détecteur de gaz"""
     gas_status = get_gas_status(current_gas_value)
@@ -440,9 +496,26 @@ async def get_gas_value():
         "message": gas_status
     }
 
+@app.get("/ready")
+def readiness_check():
+    """Prêt uniquement quand les modèles des fonctionnalités actives sont chargés"""
+    models = {"face_recognition": face_recognition_module.describe()} if "face" in FEATURES else {}
+    ready = all(m["status"] == LazyResource.READY for m in models.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "features": sorted(FEATURES), "models": models},
+    )
+
+if "devices" in FEATURES:
+    app.include_router(device_router)
+if "face" in FEATURES:
+    app.include_router(face_router)
+if "gas" in FEATURES:
+    app.include_router(gas_router)
+
 if __name__ == "__main__":
     import uvicorn
-    logger.info("🚀 Démarrage API ESP32 complète...")
+    logger.info(f"🚀 Démarrage API ESP32 (fonctionnalités: {', '.join(sorted(FEATURES))})...")
     logger.info("📱 WebSocket Gaz: ws://localhost:8000/ws/gas")
     logger.info("📊 Endpoints:")
     logger.info("   - POST/GET /gas-detector")
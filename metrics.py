@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Dict, Iterable, Tuple
+
+# METRICS_ENABLED=0 : aucune mesure, les décorateurs renvoient la fonction d'origine
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NOOP = nullcontext()
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [compteurs par bucket (+Inf inclus), somme, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = self._header()
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = _format_labels(self.label_names, labels, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                suffix = _format_labels(self.label_names, labels)
+                lines.append(f"{self.name}_sum{suffix} {total!r}")
+                lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Latence des requêtes HTTP par route", ("method", "route", "status")))
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "stage_duration_seconds", "Durée des étapes internes (image, visage, DB, Vosk, LLM...)", ("stage",)))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    "stage_errors_total", "Nombre d'étapes terminées par une exception", ("stage",)))
+WEBSOCKET_CONNECTIONS = REGISTRY.register(Gauge(
+    "websocket_connections", "Connexions WebSocket actives", ("channel",)))
+BROADCAST_LATENCY = REGISTRY.register(Histogram(
+    "websocket_broadcast_duration_seconds", "Durée d'une diffusion WebSocket à tous les clients", ("channel",)))
+BROADCAST_FANOUT = REGISTRY.register(Histogram(
+    "websocket_broadcast_fanout", "Nombre de clients par diffusion", ("channel",),
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)))
+
+
+@contextmanager
+def _timed_stage(name: str, expected: Tuple[type, ...] = ()):
+    start = time.perf_counter()
+    try:
+        yield
+    except expected:
+        raise
+    except BaseException:
+        STAGE_ERRORS.inc(name)
+        raise
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, name)
+
+
+def stage(name: str, expected: Tuple[type, ...] = ()):
+    """Context manager mesurant la durée d'une étape (no-op si désactivé).
+
+    Les exceptions de ``expected`` (ex: HTTPException 404) ne comptent pas
+    comme des erreurs de l'étape.
+    """
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _timed_stage(name, expected)
+
+
+def timed(name: str, expected: Tuple[type, ...] = ()):
+    """Décorateur équivalent à ``stage`` pour une fonction entière"""
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with _timed_stage(name, expected):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def install(app):
+    """Ajoute le middleware de latence par route et l'endpoint /metrics"""
+    if not METRICS_ENABLED:
+        return
+
+    from fastapi import Request
+    from fastapi.responses import PlainTextResponse
+
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        start = time.perf_counter()
+        status = "500"
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            # Le modèle de route (/device/{device_id}) limite la cardinalité des labels
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            REQUEST_LATENCY.observe(time.perf_counter() - start, request.method, path, status)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
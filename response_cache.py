@@ -0,0 +1,221 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Callable, List, Optional, Sequence, Tuple
+
+
+def normalize_question(text: str) -> str:
+    """Normalise une transcription : minuscules, sans accents ni ponctuation"""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def _numbers(key: str) -> List[str]:
+    return re.findall(r"\d+", key)
+
+
+def context_fingerprint(*parts: str) -> str:
+    """Empreinte du contexte (prompt système, APP_CONTEXT...) utilisée pour invalider le cache"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+class _CacheEntry:
+    __slots__ = ("response", "created_at", "embedding", "size")
+
+    def __init__(self, key: str, response: str, created_at: float, embedding: Optional[Sequence[float]]):
+        self.response = response
+        self.created_at = created_at
+        # Stocké en float32 compact : une liste Python de floats coûte ~4x plus
+        self.embedding = array("f", embedding) if embedding is not None else None
+        self.size = len(key.encode("utf-8")) + len(response.encode("utf-8"))
+        if self.embedding is not None:
+            self.size += self.embedding.itemsize * len(self.embedding)
+
+
+class ResponseCache:
+    """Cache LRU/TTL des réponses de l'assistant, indexé sur la question normalisée.
+
+    La recherche se fait d'abord par clé exacte, puis (optionnellement) par
+    similarité floue (difflib) ou par embeddings si ``embed_fn`` est fourni.
+    Une correspondance approximative n'est jamais acceptée si les nombres des
+    deux questions diffèrent ("allumer lampe 1" / "allumer lampe 2").
+    Le cache est vidé automatiquement dès que l'empreinte du contexte change.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 1_000_000,
+        ttl_seconds: float = 3600.0,
+        fuzzy_threshold: Optional[float] = None,
+        embed_fn: Optional[Callable[[str], Optional[List[float]]]] = None,
+        embedding_threshold: float = 0.92,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.fuzzy_threshold = fuzzy_threshold
+        self.embed_fn = embed_fn
+        self.embedding_threshold = embedding_threshold
+        self._clock = clock
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ---------- Gestion interne ----------
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _expired(self, entry: _CacheEntry, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.created_at > self.ttl_seconds
+
+    def _check_fingerprint(self, fingerprint: str):
+        if self._fingerprint != fingerprint:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._fingerprint = fingerprint
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        if self.embed_fn is None:
+            return None
+        try:
+            return self.embed_fn(text)
+        except Exception:
+            return None
+
+    def _find_similar(self, key: str, embedding: Optional[List[float]], now: float) -> Optional[str]:
+        best_key, best_score = None, 0.0
+        numbers = _numbers(key)
+        for candidate, entry in self._entries.items():
+            if self._expired(entry, now) or _numbers(candidate) != numbers:
+                continue
+            if embedding is not None and entry.embedding is not None:
+                score = _cosine(embedding, entry.embedding)
+                threshold = self.embedding_threshold
+            elif self.fuzzy_threshold is not None:
+                score = SequenceMatcher(None, key, candidate).ratio()
+                threshold = self.fuzzy_threshold
+            else:
+                continue
+            if score >= threshold and score > best_score:
+                best_key, best_score = candidate, score
+        return best_key
+
+    # ---------- API publique ----------
+
+    def lookup(self, question: str, fingerprint: str) -> Tuple[Optional[str], Optional[List[float]]]:
+        """Retourne (réponse en cache ou None, embedding de la question).
+
+        L'embedding n'est calculé qu'après un échec de la recherche exacte ;
+        il peut être repassé à ``put`` pour éviter un second appel.
+        """
+        key = normalize_question(question)
+        if not key:
+            return None, None
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, self._clock()):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.response, None
+            if self.fuzzy_threshold is None and self.embed_fn is None:
+                self.misses += 1
+                return None, None
+
+        # Appel potentiellement lent (HTTP) : hors du verrou
+        embedding = self._embed(key)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            similar = self._find_similar(key, embedding, self._clock())
+            if similar is None:
+                self.misses += 1
+                return None, embedding
+            self._entries.move_to_end(similar)
+            self.hits += 1
+            self.fuzzy_hits += 1
+            return self._entries[similar].response, embedding
+
+    def get(self, question: str, fingerprint: str) -> Optional[str]:
+        """Retourne la réponse en cache pour cette question, ou None"""
+        return self.lookup(question, fingerprint)[0]
+
+    def put(self, question: str, response: str, fingerprint: str, embedding: Optional[List[float]] = None):
+        """Enregistre la réponse de l'assistant pour cette question.
+
+        ``embedding`` est celui renvoyé par ``lookup`` ; à défaut il est calculé ici.
+        """
+        key = normalize_question(question)
+        if not key or not response:
+            return
+        if embedding is None:
+            embedding = self._embed(key)
+        entry = _CacheEntry(key, response, self._clock(), embedding)
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += entry.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "fuzzy_hits": self.fuzzy_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,73 @@
+import sys
+import threading
+
+import pytest
+
+from lazy_models import LazyResource
+
+
+def test_get_loads_inline_once():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "modele"
+
+    resource = LazyResource("test", loader)
+    assert resource.status == LazyResource.PENDING
+    assert resource.get() == "modele"
+    assert resource.get() == "modele"
+    assert calls == [1]
+    assert resource.ready
+    assert resource.describe()["status"] == LazyResource.READY
+
+
+def test_get_timeout_while_background_loading():
+    release = threading.Event()
+    resource = LazyResource("lent", lambda: release.wait(5) and "modele")
+    resource.start_background()
+    try:
+        assert resource.status == LazyResource.LOADING
+        with pytest.raises(TimeoutError):
+            resource.get(timeout=0.05)
+    finally:
+        release.set()
+    assert resource.get(timeout=5) == "modele"
+
+
+def test_start_background_only_claims_once():
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "modele"
+
+    resource = LazyResource("test", loader)
+    resource.start_background()
+    resource.start_background()
+    release.set()
+    assert resource.get(timeout=5) == "modele"
+    assert calls == [1]
+
+
+@pytest.mark.parametrize("error", [ValueError("modèle corrompu"), SystemExit(1)])
+def test_loader_failure_marks_failed(error):
+    def loader():
+        raise error
+
+    resource = LazyResource("casse", loader)
+    with pytest.raises(RuntimeError, match="casse non chargé"):
+        resource.get()
+    assert resource.status == LazyResource.FAILED
+    assert repr(error) in resource.describe()["error"]
+
+
+def test_background_system_exit_marks_failed():
+    # face_recognition appelle quit() quand face_recognition_models est absent
+    resource = LazyResource("face", lambda: sys.exit("modèles absents"))
+    resource.start_background()
+    with pytest.raises(RuntimeError):
+        resource.get(timeout=5)
+    assert resource.describe()["status"] == LazyResource.FAILED
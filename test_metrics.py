@@ -0,0 +1,96 @@
+import pytest
+
+import metrics
+from metrics import Counter, Gauge, Histogram
+
+
+def test_histogram_bucket_placement_and_cumulative_render():
+    histogram = Histogram("latence", "aide", ("route",), buckets=(0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value, "/gas")
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP latence aide", "# TYPE latence histogram"]
+    # Une valeur égale à une borne tombe dans ce bucket (le = "inférieur ou égal")
+    assert lines[2:] == [
+        'latence_bucket{route="/gas",le="0.1"} 2',
+        'latence_bucket{route="/gas",le="0.5"} 3',
+        'latence_bucket{route="/gas",le="1.0"} 3',
+        'latence_bucket{route="/gas",le="+Inf"} 4',
+        'latence_sum{route="/gas"} 2.45',
+        'latence_count{route="/gas"} 4',
+    ]
+
+
+def test_label_escaping():
+    counter = Counter("requetes_total", "aide", ("route",))
+    counter.inc('a"b\\c\nd')
+    assert counter.render()[-1] == 'requetes_total{route="a\\"b\\\\c\\nd"} 1'
+
+
+def test_gauge_set_and_dec():
+    gauge = Gauge("connexions", "aide", ("channel",))
+    gauge.set(3, "gas")
+    gauge.dec("gas")
+    assert gauge.render()[-1] == 'connexions{channel="gas"} 2'
+
+
+def _stage_count(name):
+    prefix = f'stage_duration_seconds_count{{stage="{name}"}} '
+    for line in metrics.REGISTRY.render().splitlines():
+        if line.startswith(prefix):
+            return int(line[len(prefix):])
+    return 0
+
+
+def _stage_errors(name):
+    prefix = f'stage_errors_total{{stage="{name}"}} '
+    for line in metrics.REGISTRY.render().splitlines():
+        if line.startswith(prefix):
+            return int(line[len(prefix):])
+    return 0
+
+
+def test_stage_records_duration_and_errors():
+    class ClientError(Exception):
+        pass
+
+    with metrics.stage("test_ok"):
+        pass
+    with pytest.raises(ClientError):
+        with metrics.stage("test_ok", expected=(ClientError,)):
+            raise ClientError()
+    with pytest.raises(ValueError):
+        with metrics.stage("test_ok", expected=(ClientError,)):
+            raise ValueError()
+
+    assert _stage_count("test_ok") == 3
+    assert _stage_errors("test_ok") == 1
+
+
+def test_timed_ignores_expected_exceptions():
+    class ClientError(Exception):
+        pass
+
+    @metrics.timed("test_timed", expected=(ClientError,))
+    def fails():
+        raise ClientError()
+
+    with pytest.raises(ClientError):
+        fails()
+    assert _stage_count("test_timed") == 1
+    assert _stage_errors("test_timed") == 0
+
+
+def test_disabled_metrics_are_no_ops(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+
+    assert metrics.stage("test_off") is metrics._NOOP
+
+    def func():
+        return 42
+
+    assert metrics.timed("test_off")(func) is func
+    with metrics.stage("test_off"):
+        pass
+    assert _stage_count("test_off") == 0
@@ -0,0 +1,102 @@
+from response_cache import ResponseCache, normalize_question
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_question():
+    assert normalize_question("  Comment PAYER la facture, JIRAMA ?! ") == "comment payer la facture jirama"
+    assert normalize_question("Où sont les capteurs ?") == "ou sont les capteurs"
+    assert normalize_question("") == ""
+
+
+def test_exact_hit_after_normalization():
+    cache = ResponseCache()
+    cache.put("Comment payer la facture JIRAMA ?", "Page Energie", "f")
+    assert cache.get("comment payer la facture jirama", "f") == "Page Energie"
+    assert cache.stats()["hits"] == 1
+
+
+def test_fuzzy_disabled_by_default():
+    cache = ResponseCache()
+    cache.put("comment payer la facture jirama", "Page Energie", "f")
+    assert cache.get("comment payer ma facture jirama", "f") is None
+
+
+def test_fuzzy_match_refuses_different_numbers():
+    cache = ResponseCache(fuzzy_threshold=0.9)
+    cache.put("allumer lampe 1", "Lampe 1 allumée", "f")
+    assert cache.get("allumer lampe 2", "f") is None
+    assert cache.get("allumer lampe 10", "f") is None
+    assert cache.get("allumer la lampe 1", "f") == "Lampe 1 allumée"
+    assert cache.stats()["fuzzy_hits"] == 1
+
+
+def test_embedding_computed_only_on_exact_miss():
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return [1.0, 0.0]
+
+    cache = ResponseCache(embed_fn=embed)
+    response, embedding = cache.lookup("aide", "f")
+    assert response is None and embedding == [1.0, 0.0]
+    cache.put("aide", "Voici l'aide", "f", embedding)
+    assert calls == ["aide"]
+
+    assert cache.get("aide", "f") == "Voici l'aide"
+    assert calls == ["aide"]
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResponseCache(ttl_seconds=10, clock=clock)
+    cache.put("aide", "Voici l'aide", "f")
+    clock.now = 9
+    assert cache.get("aide", "f") == "Voici l'aide"
+    clock.now = 11
+    assert cache.get("aide", "f") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction_by_entries():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "1", "f")
+    cache.put("b", "2", "f")
+    cache.get("a", "f")
+    cache.put("c", "3", "f")
+    assert cache.get("b", "f") is None
+    assert cache.get("a", "f") == "1"
+    assert cache.get("c", "f") == "3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_eviction_by_bytes():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", "x" * 5, "f")
+    cache.put("b", "y" * 5, "f")
+    assert cache.get("a", "f") is None
+    assert cache.stats()["bytes"] == 6
+    cache.put("c", "z" * 10, "f")
+    assert cache.get("c", "f") is None
+
+
+def test_size_counts_key_and_embedding():
+    cache = ResponseCache(embed_fn=lambda text: [0.5] * 100)
+    cache.put("aide", "ok", "f")
+    # clé (4) + réponse (2) + 100 floats en float32
+    assert cache.stats()["bytes"] == 4 + 2 + 100 * 4
+
+
+def test_fingerprint_change_invalidates():
+    cache = ResponseCache()
+    cache.put("aide", "Voici l'aide", "v1")
+    assert cache.get("aide", "v2") is None
+    stats = cache.stats()
+    assert stats["invalidations"] == 1 and stats["entries"] == 0
@@ -1,6 +1,7 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, APIRouter, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import vosk
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 import wave
 import json
 import tempfile
@@ -9,6 +10,9 @@ import logging
 from pydub import AudioSegment  # ✅ AJOUTER CETTE LIGNE
 import urllib3
 import requests
+from response_cache import ResponseCache, context_fingerprint
+from lazy_models import LazyResource, enabled_features, warmup_enabled
+import metrics
 
 
 APP_CONTEXT = """
@@ -54,32 +58,86 @@ Réponds de manière concise et claire."""
     }
 ]
 
+OLLAMA_URL = "http://localhost:11434"
+#    phi3:mini 
+# gemma2:2b
+OLLAMA_MODEL = "gemma2:2b"
+OLLAMA_OPTIONS = {
+    "temperature": 0.3,
+    "top_p": 0.9
+}
+
+# 🧠 Cache des réponses (questions fréquentes type FAQ)
+# RESPONSE_CACHE_FUZZY=0.9 active la correspondance approximative (désactivée par défaut),
+# RESPONSE_CACHE_EMBED_MODEL active la similarité par embeddings Ollama
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1") != "0"
+RESPONSE_CACHE_EMBED_MODEL = os.getenv("RESPONSE_CACHE_EMBED_MODEL")
+
+
+def get_ollama_embedding(text):
+    """Embedding Ollama utilisé pour la correspondance sémantique du cache"""
+    response = requests.post(
+        f"{OLLAMA_URL}/api/embeddings",
+        json={"model": RESPONSE_CACHE_EMBED_MODEL, "prompt": text},
+        timeout=5,
+    )
+    response.raise_for_status()
+    return response.json().get("embedding")
+
+
+fuzzy_threshold = float(os.getenv("RESPONSE_CACHE_FUZZY", "0"))
+response_cache = ResponseCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "256")),
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", "1000000")),
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+    fuzzy_threshold=fuzzy_threshold if fuzzy_threshold > 0 else None,
+    embed_fn=get_ollama_embedding if RESPONSE_CACHE_EMBED_MODEL else None,
+)
+
+
+def get_cache_fingerprint():
+    """Toute modification du prompt système, d'APP_CONTEXT ou du modèle invalide le cache"""
+    return context_fingerprint(
+        conversation_history[0]["content"],
+        APP_CONTEXT,
+        OLLAMA_MODEL,
+        json.dumps(OLLAMA_OPTIONS, sort_keys=True),
+    )
+
+
 def call_ollama_chat_mistral(prompt):
-    url = "http://localhost:11434/api/chat"
+    url = f"{OLLAMA_URL}/api/chat"
     headers = {"Content-Type": "application/json"}
+
+    fingerprint = get_cache_fingerprint() if RESPONSE_CACHE_ENABLED else None
+    if fingerprint is not None:
+        cached, embedding = response_cache.lookup(prompt, fingerprint)
+        if cached is not None:
+            conversation_history.append({"role": "user", "content": prompt})
+            conversation_history.append({"role": "assistant", "content": cached})
+            print("Ollama response (cache):", cached)
+            return cached
     
     # Ajouter la question de l'utilisateur à l'historique
     conversation_history.append({"role": "user", "content": prompt})
-#    phi3:mini 
-# gemma2:2b
     payload = {
-        "model": "gemma2:2b",
+        "model": OLLAMA_MODEL,
         "messages": conversation_history,
         "stream": False,
-        "options": {
-            "temperature": 0.3,
-            "top_p": 0.9
-        }
+        "options": OLLAMA_OPTIONS
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers, verify=False)
+        with metrics.stage("llm_call"):
+            response = requests.post(url, json=payload, headers=headers, verify=False)
         response.raise_for_status()
         data = response.json()
 
         if "message" in data and "content" in data["message"]:
             content = data["message"]["content"]
             conversation_history.append({"role": "assistant", "content": content})
+            if fingerprint is not None:
+                response_cache.put(prompt, content, fingerprint, embedding)
             
             # ✅ AJOUT IMPORTANT : Ajo
             print("Ollama response:", content)
@@ -105,21 +163,45 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+metrics.install(app)
+
+FEATURES = enabled_features({"voice"})
+voice_router = APIRouter()
 
-# Charger le modèle Vosk
+# Modèle Vosk chargé en arrière-plan au démarrage (ou à la première requête)
 model_path = "vosk-model-fr-0.22"
-try:
-    model = vosk.Model(model_path)
-    logger.info(f"Modèle Vosk chargé depuis {model_path}")
-except Exception as e:
-    logger.error(f"Erreur lors du chargement du modèle: {e}")
-    model = None
-
-@app.post("/transcribe")
+MODEL_WAIT_TIMEOUT = float(os.getenv("MODEL_WAIT_TIMEOUT", "30"))
+
+
+def load_vosk_model():
+    import vosk
+    return vosk.Model(model_path)
+
+
+vosk_model = LazyResource("Modèle Vosk", load_vosk_model)
+
+
+@app.on_event("startup")
+def warmup_models():
+    if "voice" in FEATURES and warmup_enabled():
+        vosk_model.start_background()
+
+
+def get_vosk_model():
+    try:
+        return vosk_model.get(timeout=MODEL_WAIT_TIMEOUT)
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="Modèle Vosk en cours de chargement")
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@voice_router.post("/transcribe")
 async def transcribe(file: UploadFile = File(...)):
-    if model is None:
-        raise HTTPException(status_code=500, detail="Modèle Vosk non chargé")
-    
+    # L'attente du modèle se fait hors de la boucle d'événements
+    model = await run_in_threadpool(get_vosk_model)
+    import vosk
+
     logger.info(f"📥 Fichier reçu: {file.filename}, type: {file.content_type}")
     
     # Sauvegarder le fichier uploadé
@@ -140,16 +222,17 @@ async def transcribe(file: UploadFile = File(...)):
     try:
         # Convertir en WAV valide avec pydub
         logger.info("🔄 Conversion en WAV...")
-        audio = AudioSegment.from_file(temp_input_path)
-        
-        # Convertir en mono, 16000 Hz, 16-bit
-        audio = audio.set_channels(1)
-        audio = audio.set_frame_rate(16000)
-        audio = audio.set_sample_width(2)  # 16-bit = 2 bytes
-        
-        # Sauvegarder en WAV
-        temp_audio_path = temp_input_path.replace(".tmp", ".wav")
-        audio.export(temp_audio_path, format="wav")
+        with metrics.stage("pydub_conversion"):
+            audio = AudioSegment.from_file(temp_input_path)
+            
+            # Convertir en mono, 16000 Hz, 16-bit
+            audio = audio.set_channels(1)
+            audio = audio.set_frame_rate(16000)
+            audio = audio.set_sample_width(2)  # 16-bit = 2 bytes
+            
+            # Sauvegarder en WAV
+            temp_audio_path = temp_input_path.replace(".tmp", ".wav")
+            audio.export(temp_audio_path, format="wav")
         logger.info(f"✅ Fichier WAV créé: {temp_audio_path}")
         
         # Transcription avec Vosk
@@ -161,22 +244,23 @@ async def transcribe(file: UploadFile = File(...)):
             if wav_file.getsampwidth() != 2:
                 raise HTTPException(status_code=400, detail="Le fichier audio doit être 16-bit PCM")
 
-            rec = vosk.KaldiRecognizer(model, wav_file.getframerate())
-            rec.SetWords(True)
-            results = []
+            with metrics.stage("vosk_decode"):
+                rec = vosk.KaldiRecognizer(model, wav_file.getframerate())
+                rec.SetWords(True)
+                results = []
 
-            while True:
-                data = wav_file.readframes(4000)
-                if len(data) == 0:
-                    break
-                if rec.AcceptWaveform(data):
-                    res = json.loads(rec.Result())
-                    if res.get("text"):
-                        results.append(res)
+                while True:
+                    data = wav_file.readframes(4000)
+                    if len(data) == 0:
+                        break
+                    if rec.AcceptWaveform(data):
+                        res = json.loads(rec.Result())
+                        if res.get("text"):
+                            results.append(res)
 
-            final_res = json.loads(rec.FinalResult())
-            if final_res.get("text"):
-                results.append(final_res)
+                final_res = json.loads(rec.FinalResult())
+                if final_res.get("text"):
+                    results.append(final_res)
 
             text = " ".join([r.get("text", "") for r in results if r.get("text")])
             response=call_ollama_chat_mistral(text)
@@ -196,7 +280,24 @@ async def transcribe(file: UploadFile = File(...)):
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "model_loaded": model is not None, "model_path": model_path}
+    return {"status": "healthy", "model_loaded": vosk_model.ready, "model_path": model_path}
+
+@app.get("/ready")
+async def readiness_check():
+    """Prêt uniquement quand les modèles des fonctionnalités actives sont chargés"""
+    models = {"vosk": vosk_model.describe()} if "voice" in FEATURES else {}
+    ready = all(m["status"] == LazyResource.READY for m in models.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "features": sorted(FEATURES), "models": models},
+    )
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"enabled": RESPONSE_CACHE_ENABLED, **response_cache.stats()}
+
+if "voice" in FEATURES:
+    app.include_router(voice_router)
 
 if __name__ == "__main__":
     import uvicorn